@@ -0,0 +1,118 @@
+"""
+QuakeGuard Alert Worker
+-----------------------
+Consumes the alarms queued by the background worker's Lua script on the
+alerts stream and stores them as persistent Alerts in PostgreSQL.
+
+Runs as its own process, with its own session: a slow `alerts` insert never
+delays the next batch of readings, and a failing one leaves ingestion alone.
+Delivery is at-least-once, like the events stream: entries are acknowledged
+after commit, and a replayed alarm is dropped by the alerts table's unique
+(zone, minute) index. Needs its own WORKER_NAME, stable across restarts.
+"""
+
+import time
+from datetime import datetime, timezone
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from src.database import SessionLocal
+from src.models import Alert
+from src.worker import (
+    SEISMIC_ALERTS_STREAM, CONSUMER_GROUP, CONSUMER_NAME, REJECTED_DATA_ERRORS,
+    redis_sync, ensure_consumer_group, read_entries
+)
+
+# --- CONFIGURATION ---
+MAX_ALERT_BATCH = 100  # Alarms read from the stream per wake-up
+
+
+def decode_alert(fields):
+    """
+    Parses one queued alarm; raises ValueError (or TypeError) if a field is
+    missing or malformed.
+    """
+    try:
+        return {
+            "zone_id": int(fields["zone_id"]),
+            "count": int(fields["count"]),
+            "detected_at": datetime.fromtimestamp(float(fields["detected_at"]), timezone.utc)
+        }
+    except KeyError as e:
+        raise ValueError(f"alarm without {e}: {fields}")
+
+
+def store_alert(db, alarm):
+    """
+    Inserts the Alert for one alarm, timestamped with its detection time.
+    ON CONFLICT DO NOTHING against ux_alert_zone_minute: returns None if the
+    zone already has its alert for that minute, the new row's id otherwise.
+    """
+    current_count = alarm["count"]
+    return db.scalar(
+        pg_insert(Alert).values(
+            zone_id=alarm["zone_id"],
+            timestamp=alarm["detected_at"],
+            severity=float(current_count) / 10.0, # Example severity logic
+            message=f"Seismic Swarm Detected: {current_count} sensors triggered."
+        ).on_conflict_do_nothing().returning(Alert.id)
+    )
+
+
+def run_alert_worker():
+    """
+    Continuous loop consuming the 'seismic_alerts_stream' stream, one
+    transaction per batch of alarms.
+    """
+    print(f"🔔 Alert worker {CONSUMER_NAME} started.")
+
+    db = SessionLocal()
+
+    # Start with entries left unacknowledged by a previous run
+    pending = True
+
+    while True:
+        try:
+            if pending:
+                ensure_consumer_group(SEISMIC_ALERTS_STREAM)
+            batch = read_entries(SEISMIC_ALERTS_STREAM, pending, MAX_ALERT_BATCH)
+        except Exception as e:
+            print(f"❌ Error reading the alerts stream: {str(e)}")
+            pending = True # Recreate the group if Redis lost it, then replay
+            time.sleep(1) # Prevent rapid-fire errors if the Redis connection drops
+            continue
+
+        if not batch:
+            # Backlog replayed (or block timeout): go back to new entries
+            pending = False
+            continue
+
+        alarms = []
+        for _, fields in batch:
+            try:
+                alarms.append(decode_alert(fields))
+            except (ValueError, TypeError) as e:
+                print(f"⚠️ Dropping malformed alarm: {str(e)}")
+
+        try:
+            with db.begin():
+                for alarm in alarms:
+                    # Each alarm in its own savepoint: one the database refuses
+                    # (e.g. its zone was deleted) is dropped on its own instead
+                    # of failing, and replaying, the whole batch forever
+                    try:
+                        with db.begin_nested():
+                            alert_id = store_alert(db, alarm)
+                    except REJECTED_DATA_ERRORS as e:
+                        print(f"⚠️ Dropping alarm for zone {alarm['zone_id']}: {str(getattr(e, 'orig', e)).strip()}")
+                        continue
+                    if alert_id is not None:
+                        print(f"📝 Alert stored for zone {alarm['zone_id']} ({alarm['count']} events)")
+            # Acknowledged only once committed, as in the events worker
+            redis_sync.xack(SEISMIC_ALERTS_STREAM, CONSUMER_GROUP, *(entry_id for entry_id, _ in batch))
+        except Exception as e:
+            print(f"❌ Error storing batch of {len(alarms)} alarms: {str(e)}")
+            pending = True # Retry the unacknowledged entries
+            time.sleep(1) # Prevent rapid-fire errors if DB/Redis connection drops
+
+if __name__ == "__main__":
+    time.sleep(5) # Give services a moment to warm up
+    run_alert_worker()
@@ -0,0 +1,99 @@
+"""
+Async Database Module (API)
+---------------------------
+The asynchronous SQLAlchemy engine (asyncpg driver) and session factory
+serving the FastAPI endpoints, so DB round-trips never block the event loop
+or hop onto the thread pool. The API startup connection wait also goes
+through this engine.
+
+Only imported by the API: the background workers, the schema migration and
+the init scripts use the sync engine in `database.py` and never load asyncpg
+nor open this pool.
+
+Connection budget:
+    Pools are per process. Running `uvicorn --workers N` opens up to
+    N x (DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_RAW_POOL_SIZE) connections,
+    plus the workers' sync pools. Keep the total below Postgres'
+    `max_connections` (100 by default), and keep DB_POOL_SIZE at least at the
+    number of concurrent requests expected per uvicorn worker.
+"""
+
+import os
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.database import DATABASE_URL
+
+# API pool sizing, tunable per deployment (see "Connection budget" above)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+# The same DSN is reused for the async engine, swapping only the driver
+# (e.g. "postgresql://..." -> "postgresql+asyncpg://...").
+ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+
+# ==========================================
+# ASYNC ENGINE CONFIGURATION (API)
+# ==========================================
+# With native async I/O a single connection is only held for the duration of
+# the actual query, so far fewer connections are needed than with the
+# thread-per-request model.
+# Formula: Total Capacity = pool_size + max_overflow
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    # 1. pool_size: The number of connections to keep open inside the connection pool.
+    pool_size=DB_POOL_SIZE,
+
+    # 2. max_overflow: The number of connections to allow in excess of pool_size.
+    #    Default total capacity = 20 + 10 = 30 connections.
+    max_overflow=DB_MAX_OVERFLOW,
+
+    # 3. pool_pre_ping: Enables "pessimistic disconnect handling".
+    #    The engine will test the connection liveness before returning it.
+    #    Prevents "server closed the connection unexpectedly" errors.
+    pool_pre_ping=True,
+
+    # 4. pool_recycle: Recycle connections every hour (3600s) to prevent stale connections.
+    pool_recycle=3600,
+
+    # 5. query_cache_size: Compiled-SQL cache entries (default 500). Every
+    #    statement shape is compiled once and reused by all later requests.
+    #    Column types must be cacheable (cache_ok=True) for this to apply;
+    #    GeoAlchemy2's Geometry already is.
+    query_cache_size=1200,
+
+    # 6. pool_use_lifo: Hand out the most recently returned connection first.
+    #    Under normal load the same few connections stay hot (warm server-side
+    #    caches) and the idle surplus is left to age out via pool_recycle.
+    pool_use_lifo=True,
+
+    # 7. prepared_statement_cache_size: asyncpg prepared statements kept per
+    #    connection by the SQLAlchemy dialect (default 100). Together with the
+    #    compiled cache above, each statement shape is parsed and planned by
+    #    Postgres once per connection instead of once per request.
+    connect_args={"prepared_statement_cache_size": 512}
+)
+
+# ==========================================
+# SESSION FACTORY
+# ==========================================
+# expire_on_commit=False: Objects stay readable after commit without triggering
+# an implicit (and, under asyncio, illegal) lazy refresh.
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+async def get_db():
+    """
+    Dependency generator for FastAPI path operations.
+    Creates a new async database session for each request and ensures it is
+    closed regardless of whether the request succeeds or fails.
+
+    Yields:
+        AsyncSession: A SQLAlchemy async session attached to the connection pool.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
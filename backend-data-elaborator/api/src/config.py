@@ -0,0 +1,15 @@
+"""
+Application Settings
+--------------------
+Environment-driven configuration shared by the API modules.
+The database connection string is handled by `database.py`.
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Redis instance used for the ingestion queue, counters and response cache
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
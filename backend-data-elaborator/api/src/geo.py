@@ -0,0 +1,18 @@
+"""
+Geospatial Helpers
+------------------
+Conversions between plain GPS coordinates and PostGIS geometry values.
+"""
+
+from geoalchemy2.elements import WKTElement
+
+# WGS 84, the reference system used by GPS receivers
+GPS_SRID = 4326
+
+
+def gps_point(latitude: float, longitude: float) -> WKTElement:
+    """
+    Builds a PostGIS POINT from GPS coordinates.
+    Note: WKT orders coordinates as (longitude latitude), i.e. (X Y).
+    """
+    return WKTElement(f"POINT({longitude} {latitude})", srid=GPS_SRID)
@@ -1,5 +1,6 @@
-from database import engine, Base
-from models import Zone, Misurator, Misuration
+from src.database import engine, Base
+from src.models import Zone, Misurator, Misuration, MisuratorStats
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 def init_database():
@@ -9,41 +10,41 @@ def init_database():
     print("Tables succesfully created!")
 
     # Put example data
+    # Core INSERTs (executemany): plain rows, no ORM objects to track.
+    # One transaction for the whole seed: a single commit, and any error
+    # rolls back all of it (Session.begin() commits or rolls back on exit).
     print("Inserting example data")
-    db = Session(bind=engine)
-
     try:
-        # Create Zones
-        zone1 = Zone(city="Milano")
-        zone2 = Zone(city="Bergamo")
-        zone3 = Zone(city="Treviglio")
-        zone4 = Zone(city="Cologno al Serio")
-
-        db.add_all([zone1, zone2, zone3])
-        db.commit()
-
-        # Create Misurators
-        misurator1 = Misurator(active=False, zone_id=4)
-        misurator2 = Misurator(active=False, zone_id=4)
-
-        db.add_all([misurator1, misurator2])
-        db.commit()
-
-        # Create Misurations
-        misuration1 = Misuration(value=100, misurator_id=1)
-        misuration2 = Misuration(value=200, misurator_id=2)
-
-        db.add_all([misuration1, misuration2])
-        db.commit()
+        with Session(bind=engine) as db, db.begin():
+            # Create Zones (RETURNING gives back the generated ids)
+            cities = ["Milano", "Bergamo", "Treviglio", "Cologno al Serio"]
+            zone_ids = db.scalars(
+                insert(Zone).returning(Zone.id, sort_by_parameter_order=True),
+                [{"city": city} for city in cities]
+            ).all()
+
+            # Create Misurators (inactive demo sensors in the last zone;
+            # no real key yet, register one through POST /misurators/)
+            misurator_ids = db.scalars(
+                insert(Misurator).returning(Misurator.id, sort_by_parameter_order=True),
+                [{"active": False, "zone_id": zone_ids[3], "public_key_hex": ""} for _ in range(2)]
+            ).all()
+
+            # Create Misurations (and their per-sensor running statistics)
+            values = [100, 200]
+            db.execute(insert(Misuration), [
+                {"value": value, "misurator_id": misurator_id}
+                for misurator_id, value in zip(misurator_ids, values)
+            ])
+            db.execute(insert(MisuratorStats), [
+                {"misurator_id": misurator_id, "total_readings": 1, "value_sum": value, "max_value": value, "min_value": value}
+                for misurator_id, value in zip(misurator_ids, values)
+            ])
 
         print("Example data succesfully loaded!")
 
     except Exception as e:
         print(f"Error caught while inserting data: {e}")
-        db.rollback()
-
-    finally:
-        db.close()
 
 if __name__ == "__main__":
-    init_database()
\ No newline at end of file
+    init_database()
@@ -0,0 +1,123 @@
+"""
+QuakeGuard Schema Migration
+---------------------------
+Brings the database schema up to date. Runs once per deployment, before the
+API starts serving (see the Dockerfile CMD), so the uvicorn worker processes
+start without issuing any DDL or catalog reflection of their own.
+
+Idempotent: existing tables only gain missing indexes and lose legacy
+indexes and columns (once, duplicate alerts sharing a zone and minute are
+removed so their unique index can be built), so it is safe to run on every
+container start.
+
+Usage:
+    python src/migrate.py
+"""
+
+import time
+from sqlalchemy import text, select, insert, inspect, func
+from sqlalchemy.exc import OperationalError
+from src.database import engine
+import src.models as models
+
+# Arbitrary app-wide key for the schema migration advisory lock
+SCHEMA_LOCK_KEY = 720_001
+
+# Indexes no longer declared by the models
+LEGACY_INDEXES = [
+    "ix_misurations_created_at"  # btree on misurations.created_at, replaced by ix_mis_created_brin
+]
+
+# Columns no longer declared by the models
+LEGACY_COLUMNS = {
+    # Float copies of the coordinates, now read from the PostGIS point (location)
+    "misurators": ["latitude", "longitude"]
+}
+
+# Unique (zone, minute) index on alerts; see Alert.__table_args__
+ALERT_MINUTE_INDEX = "ux_alert_zone_minute"
+
+# Alerts sharing a zone and (UTC) minute, written before the unique index
+# existed: all but the lowest id are deleted so the index can be built
+ALERTS_DEDUPE = text("""
+    DELETE FROM alerts a
+    USING alerts b
+    WHERE a.zone_id = b.zone_id
+      AND date_trunc('minute', timezone('UTC', a."timestamp")) = date_trunc('minute', timezone('UTC', b."timestamp"))
+      AND a.id > b.id
+""")
+
+# One-off aggregation of the existing readings into misurator_stats
+STATS_BACKFILL = insert(models.MisuratorStats).from_select(
+    ["misurator_id", "total_readings", "value_sum", "max_value", "min_value"],
+    select(
+        models.Misuration.misurator_id,
+        func.count(models.Misuration.value),
+        func.sum(models.Misuration.value),
+        func.max(models.Misuration.value),
+        func.min(models.Misuration.value)
+    ).group_by(models.Misuration.misurator_id)
+)
+
+
+def wait_for_db(retries=10, delay=3):
+    """
+    Holds the migration until the Database is ready to accept connections.
+    """
+    print("Checking Database connection...")
+    for i in range(retries):
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            print("✅ Database is up and running!")
+            return
+        except OperationalError:
+            print(f"⏳ Database not ready yet... waiting {delay}s ({i+1}/{retries})")
+            time.sleep(delay)
+
+    raise Exception("❌ Could not connect to Database after multiple retries.")
+
+
+def migrate():
+    """
+    Creates missing tables and indexes in a single transaction.
+    Serialized with a transaction-scoped advisory lock, so replicas starting
+    together never run concurrent CREATE TABLEs.
+    """
+    with engine.begin() as connection:
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        inspector = inspect(connection)
+        stats_exists = inspector.has_table(models.MisuratorStats.__tablename__)
+        alerts_need_dedupe = inspector.has_table(models.Alert.__tablename__) and ALERT_MINUTE_INDEX not in {
+            index["name"] for index in inspector.get_indexes(models.Alert.__tablename__)
+        }
+        models.Base.metadata.create_all(connection)
+
+        if alerts_need_dedupe:
+            removed = connection.execute(ALERTS_DEDUPE).rowcount
+            if removed:
+                print(f"🧹 Removed {removed} duplicate alerts (same zone and minute) before indexing.")
+
+        # create_all only indexes the tables it creates: add indexes declared
+        # since an existing table was created, and drop the indexes and
+        # columns replaced
+        for table in models.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+        for legacy_index in LEGACY_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {legacy_index}"))
+        for table_name, columns in LEGACY_COLUMNS.items():
+            drops = ", ".join(f"DROP COLUMN IF EXISTS {column}" for column in columns)
+            connection.execute(text(f"ALTER TABLE {table_name} {drops}"))
+
+        # The worker keeps misurator_stats up to date from then on; readings
+        # stored before the table existed are folded in once, here
+        if not stats_exists:
+            connection.execute(STATS_BACKFILL)
+
+    print("✅ Database schema is up to date.")
+
+
+if __name__ == "__main__":
+    wait_for_db()
+    migrate()
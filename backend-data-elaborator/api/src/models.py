@@ -6,9 +6,9 @@ It integrates PostGIS geometry types for GPS location handling and defines
 the schema for Zones, Sensors (Misurators), Measurements, and Alerts.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, Float, Index, text
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, column_property
 from geoalchemy2 import Geometry
 from src.database import Base
 
@@ -32,6 +32,10 @@ class Misurator(Base):
     Includes GPS coordinates managed via PostGIS.
     """
     __tablename__ = "misurators"
+    __table_args__ = (
+        # Serves "active sensors of a zone" lookups (zone stats, alert JOINs)
+        Index("ix_misurator_zone_active", "zone_id", "active"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     active = Column(Boolean, default=True, nullable=False)
@@ -40,9 +44,12 @@ class Misurator(Base):
     zone_id = Column(Integer, ForeignKey("zones.id"), nullable=False)
 
     # --- GPS Configuration ---
-    latitude = Column(Float, nullable=True)
-    longitude = Column(Float, nullable=True)
+    # The PostGIS point is the only stored copy of the coordinates.
+    # latitude/longitude are read-only SQL expressions (ST_Y/ST_X) evaluated
+    # by Postgres whenever a sensor is selected, so they can never drift apart.
     location = Column(Geometry('POINT', srid=4326), nullable=True)
+    latitude = column_property(func.ST_Y(location).label("latitude"))
+    longitude = column_property(func.ST_X(location).label("longitude"))
 
     # --- SECURITY (Ecco il pezzo mancante!) ---
     # Stores the ECDSA Public Key used to verify message signatures
@@ -58,9 +65,20 @@ class Misuration(Base):
     Represents a single data point (acceleration/vibration) recorded by a Misurator.
     """
     __tablename__ = "misurations"
+    __table_args__ = (
+        # Serves per-sensor sliding-window filters and "latest reading" scans
+        # as index range scans instead of a seqscan over the whole time series.
+        # INCLUDE (value) makes it covering: per-sensor aggregates are answered
+        # by an index-only scan without visiting the heap.
+        Index("ix_mis_sensor_created", "misurator_id", "created_at", postgresql_include=["value"]),
+        # Time-only range scans: rows arrive in created_at order, so a BRIN
+        # (min/max per block range) stays tiny and nearly free to maintain on
+        # insert, unlike a btree that grows with every reading
+        Index("ix_mis_created_brin", "created_at", postgresql_using="brin", postgresql_with={"pages_per_range": 32}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     value = Column(Integer, nullable=False)
     
     # Foreign Key
@@ -70,11 +88,42 @@ class Misuration(Base):
     misurator = relationship("Misurator", back_populates="misurations")
 
 
+class MisuratorStats(Base):
+    """
+    Running aggregate of a sensor's readings, maintained by the worker in the
+    same transaction as each Misuration insert.
+    Sensor statistics are read from this single row instead of re-aggregating
+    the whole time series on every request.
+    """
+    __tablename__ = "misurator_stats"
+
+    misurator_id = Column(Integer, ForeignKey("misurators.id", ondelete="CASCADE"), primary_key=True)
+    total_readings = Column(BigInteger, nullable=False)
+    value_sum = Column(BigInteger, nullable=False)  # AVG = value_sum / total_readings
+    max_value = Column(Integer, nullable=False)
+    min_value = Column(Integer, nullable=False)
+
+
 class Alert(Base):
     """
     Represents an aggregated/confirmed seismic event for a specific zone.
     """
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Serves "latest alerts of a zone" (WHERE zone_id ORDER BY timestamp DESC
+        # LIMIT n): walked backwards, it returns rows already sorted, no Sort node
+        Index("ix_alert_zone_timestamp", "zone_id", "timestamp"),
+        # At most one alert per zone per (UTC) minute, enforced by the DB: the
+        # worker inserts with ON CONFLICT DO NOTHING, so duplicate alarms (a
+        # replayed batch, a lost Redis cooldown flag) are dropped atomically.
+        # timezone('UTC', ...) keeps the expression immutable, as indexes require
+        Index(
+            "ux_alert_zone_minute",
+            "zone_id",
+            text("date_trunc('minute', timezone('UTC', \"timestamp\"))"),
+            unique=True
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     zone_id = Column(Integer, ForeignKey("zones.id"), nullable=False)
@@ -0,0 +1,80 @@
+"""
+Raw asyncpg Connection Pool
+---------------------------
+A single asyncpg pool, shared by the whole app, backs the high-frequency
+ingestion path where the ORM layer is pure overhead.
+Only imported by the API, like `async_database.py`: the workers never pay for
+FastAPI/asyncpg imports.
+"""
+
+import os
+import asyncio
+import asyncpg
+from contextlib import asynccontextmanager
+from fastapi import HTTPException, Request
+from sqlalchemy.engine import make_url
+
+from src.database import DATABASE_URL
+
+# asyncpg expects a plain libpq-style DSN without the SQLAlchemy driver suffix.
+POOL_DSN = make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+
+# Maximum time (seconds) a request may wait for a free pooled connection.
+POOL_ACQUIRE_TIMEOUT = 2.0
+
+# Upper bound of raw connections per API process (see async_database.py budget).
+# Sensor lookups are mostly served from cache, so a handful is enough.
+DB_RAW_POOL_SIZE = int(os.getenv("DB_RAW_POOL_SIZE", "8"))
+
+# --- HOT STATEMENTS ---
+# Sensor authorization data needed to verify an ingested reading
+MISURATOR_AUTH_SQL = "SELECT id, active, zone_id, public_key_hex FROM misurators WHERE id = $1"
+MISURATORS_AUTH_BATCH_SQL = "SELECT id, active, zone_id, public_key_hex FROM misurators WHERE id = ANY($1::int[])"
+
+
+async def _init_connection(conn: asyncpg.Connection):
+    """
+    Warms up every new pooled connection before it is handed out.
+    Running each hot statement once stores its server-side prepared statement
+    in the connection's statement cache, so requests never pay parse/plan.
+    (An explicit `conn.prepare()` would bypass that cache.)
+    """
+    await conn.fetchrow(MISURATOR_AUTH_SQL, 0)
+    await conn.fetch(MISURATORS_AUTH_BATCH_SQL, [])
+
+async def init_pool(app):
+    """
+    Creates the app-wide asyncpg pool. Must be awaited on application startup.
+    """
+    app.state.pool = await asyncpg.create_pool(
+        dsn=POOL_DSN,
+        min_size=min(5, DB_RAW_POOL_SIZE),
+        max_size=DB_RAW_POOL_SIZE,
+        init=_init_connection
+    )
+
+async def close_pool(app):
+    """Gracefully closes all pooled connections on application shutdown."""
+    await app.state.pool.close()
+
+async def get_pool(request: Request) -> asyncpg.Pool:
+    """Dependency returning the shared pool, for handlers that connect lazily."""
+    return request.app.state.pool
+
+@asynccontextmanager
+async def acquire(pool: asyncpg.Pool):
+    """
+    Borrows a connection from the pool and always releases it afterwards.
+
+    Raises:
+        HTTPException(503): If no connection frees up within POOL_ACQUIRE_TIMEOUT,
+        instead of letting requests queue up without bound.
+    """
+    try:
+        conn = await pool.acquire(timeout=POOL_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Database busy, retry later")
+    try:
+        yield conn
+    finally:
+        await pool.release(conn)
@@ -9,22 +9,37 @@ from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 from datetime import datetime
 
+# Shared by every schema (subclasses inherit it):
+# - from_attributes: models can be read straight from ORM objects / Rows.
+# - defer_build: validators and serializers are built on first use instead of
+#   at import, so schemas a process never touches (e.g. the *Update DTOs in
+#   the worker) cost nothing.
+DEFAULT_CONFIG = ConfigDict(from_attributes=True, defer_build=True)
+
+# Range of a PostgreSQL INTEGER column (misurations.value): larger readings
+# would be accepted here but refused by the database
+INT32_MIN, INT32_MAX = -2**31, 2**31 - 1
+
 # ==========================================
 # ZONE SCHEMAS
 # ==========================================
 
 class ZoneBase(BaseModel):
+    model_config = DEFAULT_CONFIG
+
     city: str 
 
 class ZoneCreate(ZoneBase):
     pass 
 
 class ZoneUpdate(BaseModel):
+    model_config = DEFAULT_CONFIG
+
     city: Optional[str] = None
 
 class Zone(ZoneBase):
     id: int
-    model_config = ConfigDict(from_attributes=True)
+    model_config = DEFAULT_CONFIG
 
 
 # ==========================================
@@ -32,6 +47,8 @@ class Zone(ZoneBase):
 # ==========================================
 
 class MisuratorBase(BaseModel):
+    model_config = DEFAULT_CONFIG
+
     active: bool 
     zone_id: int
 
@@ -47,6 +64,8 @@ class MisuratorCreate(MisuratorBase):
     public_key_hex: str = Field(..., description="ECDSA Public Key (NIST256p) in Hex format")
 
 class MisuratorUpdate(BaseModel):
+    model_config = DEFAULT_CONFIG
+
     active: Optional[bool] = None
     zone_id: Optional[int] = None
     public_key_hex: Optional[str] = None
@@ -58,7 +77,7 @@ class Misurator(MisuratorBase):
     # We do not return the public key by default to keep responses clean, 
     # but it can be added if needed.
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = DEFAULT_CONFIG
 
 
 # ==========================================
@@ -66,7 +85,9 @@ class Misurator(MisuratorBase):
 # ==========================================
 
 class MisurationBase(BaseModel):
-    value: int
+    model_config = DEFAULT_CONFIG
+
+    value: int = Field(..., ge=INT32_MIN, le=INT32_MAX)
     misurator_id: int
 
 class MisurationCreate(MisurationBase): 
@@ -80,14 +101,25 @@ class MisurationCreate(MisurationBase):
     # The digital signature of "value:device_timestamp"
     signature_hex: str
 
+class MisurationBatchCreate(BaseModel):
+    """
+    Payload for batched data ingestion.
+    Every reading carries its own signature and is verified independently.
+    """
+    model_config = DEFAULT_CONFIG
+
+    misurations: List[MisurationCreate] = Field(..., min_length=1, max_length=500)
+
 class MisurationUpdate(BaseModel):
-    value: Optional[int] = None
+    model_config = DEFAULT_CONFIG
+
+    value: Optional[int] = Field(None, ge=INT32_MIN, le=INT32_MAX)
     misurator_id: Optional[int] = None
 
 class Misuration(MisurationBase):
     id: int
     created_at: datetime
-    model_config = ConfigDict(from_attributes=True)
+    model_config = DEFAULT_CONFIG
 
 
 # ==========================================
@@ -98,6 +130,8 @@ class ZoneStats(BaseModel):
     """
     DTO for providing statistical aggregated data about a zone.
     """
+    model_config = DEFAULT_CONFIG
+
     zone_id: int
     city: str
     active_misurators: int
@@ -112,6 +146,8 @@ class AlertBase(BaseModel):
     """
     Base properties shared between creation and retrieval of Alerts.
     """
+    model_config = DEFAULT_CONFIG
+
     zone_id: int
     severity: float
     message: Optional[str] = None
@@ -131,4 +167,4 @@ class AlertResponse(AlertBase):
     id: int
     
     # Config to allow Pydantic to read data from the SQLAlchemy object
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = DEFAULT_CONFIG
\ No newline at end of file
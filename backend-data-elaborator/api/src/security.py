@@ -0,0 +1,196 @@
+"""
+Device Security Module
+----------------------
+ECDSA (NIST P-256 / SHA-256) verification of sensor payload signatures.
+Compatible with ESP32 MbedTLS (DER) and Standard Python (RAW) encodings.
+"""
+
+import os
+import asyncio
+import hashlib
+from functools import lru_cache
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature, Prehashed
+
+# Signature scheme shared by every sensor: ECDSA over NIST P-256 with SHA-256.
+# Verified over a precomputed digest, so the message is hashed once per check
+# even when the DER attempt falls back to RAW.
+ECDSA_SHA256_PREHASHED = ec.ECDSA(Prehashed(hashes.SHA256()))
+
+# Dedicated executor for CPU-bound signature checks, kept apart from the
+# default executor. Threads suffice: the verify itself runs inside OpenSSL,
+# not Python bytecode. The cores are split between the uvicorn worker processes
+# ($WEB_CONCURRENCY) so they do not oversubscribe the CPU; override with
+# VERIFY_POOL_SIZE.
+VERIFY_POOL_SIZE = int(os.getenv(
+    "VERIFY_POOL_SIZE",
+    max(1, (os.cpu_count() or 1) // int(os.getenv("WEB_CONCURRENCY", "1")))
+))
+VERIFY_POOL = ThreadPoolExecutor(max_workers=VERIFY_POOL_SIZE, thread_name_prefix="sig-verify")
+
+
+@lru_cache(maxsize=10_000)
+def load_verifying_key(public_key_hex: str) -> ec.EllipticCurvePublicKey:
+    """
+    Parses a sensor public key (DER first - ESP32 Standard, fallback to RAW).
+    Memoized by the hex string itself: a sensor's key is parsed and validated
+    on the curve once, then reused for every packet it sends. Being keyed by
+    content, entries can never go stale when a sensor's key changes.
+    """
+    key_bytes = bytes.fromhex(public_key_hex)
+    try:
+        # DER SubjectPublicKeyInfo (MbedTLS / X.509)
+        public_key = serialization.load_der_public_key(key_bytes)
+    except ValueError:
+        # RAW point: bare X||Y (64 bytes) or SEC1-encoded (04||X||Y, 02/03||X)
+        if len(key_bytes) == 64:
+            key_bytes = b"\x04" + key_bytes
+        return ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256R1(), key_bytes)
+
+    if not isinstance(public_key, ec.EllipticCurvePublicKey) or not isinstance(public_key.curve, ec.SECP256R1):
+        raise ValueError("Public key is not an ECDSA NIST P-256 key")
+    return public_key
+
+
+def _raw_to_der(sig_bytes: bytes) -> bytes:
+    """Re-encodes a RAW 64-byte r||s signature as DER, the format OpenSSL expects."""
+    return encode_dss_signature(
+        int.from_bytes(sig_bytes[:32], "big"),
+        int.from_bytes(sig_bytes[32:], "big")
+    )
+
+
+def verify_device_signature(public_key_hex: str, message: str, signature_hex: str) -> bool:
+    """
+    Verifies ECDSA signature using SHA256 hashing (OpenSSL backend).
+    Compatible with ESP32 MbedTLS (DER) and Standard Python (RAW).
+    """
+    try:
+        if not public_key_hex or not signature_hex:
+            return False
+            
+        sig_bytes = bytes.fromhex(signature_hex)
+        digest = hashlib.sha256(message.encode('utf-8')).digest()
+
+        # 1. Load the Key (cached per public key)
+        vk = load_verifying_key(public_key_hex)
+        
+        # 2. Normalize the signature to DER once, then verify with SHA256
+        #    (CRITICAL: Matches ESP32's mbedtls_md_info_from_type(SHA256))
+        if len(sig_bytes) == 64 and sig_bytes[0] != 0x30:
+            # RAW (r||s): cannot be DER (no SEQUENCE tag), re-encode directly
+            # instead of paying for a failed DER attempt first
+            der_sig = _raw_to_der(sig_bytes)
+        else:
+            try:
+                # Try DER (ASN.1) first
+                vk.verify(sig_bytes, digest, ECDSA_SHA256_PREHASHED)
+                return True
+            except InvalidSignature:
+                # Fallback to RAW (r||s) whose first byte happens to be 0x30
+                if len(sig_bytes) != 64:
+                    return False
+                der_sig = _raw_to_der(sig_bytes)
+
+        try:
+            vk.verify(der_sig, digest, ECDSA_SHA256_PREHASHED)
+            return True
+        except InvalidSignature:
+            return False
+
+    except Exception as e:
+        print(f"⚠️ Crypto Validation Error: {str(e)}")
+        return False
+
+
+def verify_batch(items: List[Tuple[str, str, str]]) -> List[bool]:
+    """
+    Verifies a list of (public_key_hex, message, signature_hex) tuples in one
+    executor job, so the thread hand-off is paid once per batch.
+    """
+    return [verify_device_signature(*item) for item in items]
+
+
+class SignatureBatcher:
+    """
+    Coalesces concurrent verification requests into batches.
+
+    Callers await `verify()`; a background task collects up to `max_batch`
+    pending requests (waiting at most `max_wait` seconds after the first one)
+    and runs each batch as a single `verify_batch` job on the executor.
+    Batches are dispatched without waiting for the previous ones, so every
+    executor thread can work on its own batch.
+    """
+
+    def __init__(self, executor: Executor, max_batch: int = 64, max_wait: float = 0.005):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Starts the collector task on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        """Stops collecting; requests still queued are left unanswered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def verify(self, public_key_hex: str, message: str, signature_hex: str) -> bool:
+        """Queues one signature check and waits for its batch to complete."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(((public_key_hex, message, signature_hex), future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            job = loop.run_in_executor(self.executor, verify_batch, [item for item, _ in batch])
+            job.add_done_callback(lambda job, futures=[f for _, f in batch]: self._resolve(futures, job))
+
+    @staticmethod
+    def _resolve(futures: List[asyncio.Future], job: asyncio.Future):
+        # Futures of requests that were cancelled meanwhile (client gone) are skipped
+        if job.cancelled():
+            results = [False] * len(futures)
+        elif job.exception() is not None:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(job.exception())
+            return
+        else:
+            results = job.result()
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+
+# Shared by every ingestion route; started and stopped with the app
+SIGNATURE_BATCHER = SignatureBatcher(VERIFY_POOL)
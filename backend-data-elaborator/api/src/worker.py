@@ -1,86 +1,391 @@
 """
 QuakeGuard Background Worker
 -----------------------------
-Consumes seismic events from the Redis queue, persists data to PostgreSQL,
-and detects critical seismic thresholds to generate persistent Alerts.
+Consumes seismic events from the Redis Stream, persists data to PostgreSQL,
+and detects critical seismic thresholds. Detected alarms are queued on their
+own stream and stored as persistent Alerts by the alert worker
+(src/alert_worker.py), off the readings' hot path.
+
+Events are read through a consumer group and acknowledged (XACK) only once
+their batch is committed: delivery is at-least-once. Worker replicas share
+the group and split the stream between them; each one needs its own
+WORKER_NAME, which must stay the same across restarts so the replica picks
+up the entries it had read but not yet acknowledged. Readings the database
+refuses outright (e.g. a value out of the column's range) are moved to a
+dead-letter stream instead of being replayed forever.
 """
 
-import json
+import io
+import os
+import orjson
+import psycopg2
 import redis
 import time
-from datetime import datetime
+from collections import Counter
+from functools import lru_cache
+from sqlalchemy import insert, func, exc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from src.config import REDIS_URL
 from src.database import SessionLocal
-from src.models import Misuration, Alert
+from src.models import Misuration, MisuratorStats
+from src.schemas import INT32_MIN, INT32_MAX
+from src.events import SEISMIC_EVENTS_STREAM, EVENT_FIELD
 
 # --- CONFIGURATION ---
-REDIS_HOST = 'redis'
-REDIS_PORT = 6379
+REDIS_MAX_CONNECTIONS = 4  # The loop is sequential: one connection in use at a time
 ALERT_THRESHOLD = 50       # Number of sensors triggering within the window to raise an alarm
 ALERT_WINDOW_SECONDS = 10  # Rolling time window for the counter
 ALERT_COOLDOWN = 60        # Seconds to wait before raising another alarm for the same zone
+MAX_BATCH = 500            # Events read from the stream per wake-up
+STREAM_BLOCK_MS = 5000     # Longest wait for new events per XREADGROUP call
+CONSUMER_GROUP = "workers"
+CONSUMER_NAME = os.getenv("WORKER_NAME", "worker-1")
+EVENT_FIELDS = {"value", "misurator_id", "zone_id"}  # Keys every queued reading must carry
+COPY_MIN_BATCH = 200       # From this batch size on, readings are loaded with COPY
+
+# Alarms raised by the batch loop, read by the alert worker (same group name)
+SEISMIC_ALERTS_STREAM = "seismic_alerts_stream"
+SEISMIC_ALERTS_MAXLEN = 10_000  # Approximate cap (MAXLEN ~) on the alerts stream
+
+# Readings the database refused, with the reason, kept for inspection
+SEISMIC_EVENTS_DEAD_STREAM = "seismic_events_dead"
+SEISMIC_EVENTS_DEAD_MAXLEN = 100_000
+
+# Errors caused by a reading itself (value out of range, sensor deleted since it
+# was queued): retrying the same rows can never succeed. COPY runs on the raw
+# psycopg2 cursor, so its errors are not wrapped by SQLAlchemy.
+REJECTED_DATA_ERRORS = (exc.DataError, exc.IntegrityError, psycopg2.DataError, psycopg2.IntegrityError)
+
+# Text-format COPY of the columns the worker sets (id/created_at use DB defaults)
+COPY_MISURATIONS_SQL = "COPY misurations (value, misurator_id) FROM STDIN"
+
+# Synchronous Redis client for the worker loop, on an explicit bounded pool:
+# XREADGROUP, XACK and the batch pipelines all reuse the same warm connection
+# (redis-py already sets TCP_NODELAY). Keepalive plus periodic health checks
+# let a connection dropped while idle be noticed and replaced before use.
+REDIS_POOL = redis.ConnectionPool.from_url(
+    REDIS_URL,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    socket_keepalive=True,
+    health_check_interval=30,
+    decode_responses=True
+)
+redis_sync = redis.Redis(connection_pool=REDIS_POOL)
+
+# Counter + cooldown + alarm decision for one zone, run atomically by Redis.
+# KEYS: counter, cooldown flag, alerts stream.
+# ARGV: increment, window (s), threshold, cooldown (s), zone id, detection time
+# (epoch s), alerts stream cap.
+# Returns {new_count, should_alarm}: should_alarm is 1 only for the caller that
+# set the cooldown flag, so concurrent workers never both raise the same alarm.
+# That caller's alarm is appended to the alerts stream in the same script, so
+# a claimed cooldown always comes with its queued alarm. The flag only
+# filters: the alerts table's unique (zone, minute) index is what guarantees
+# a single Alert row.
+ZONE_ALERT_LUA = """
+local c = redis.call('INCRBY', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+if c >= tonumber(ARGV[3]) and redis.call('SET', KEYS[2], 'active', 'NX', 'EX', ARGV[4]) then
+  redis.call('XADD', KEYS[3], 'MAXLEN', '~', ARGV[7], '*', 'zone_id', ARGV[5], 'count', c, 'detected_at', ARGV[6])
+  return {c, 1}
+end
+return {c, 0}
+"""
+# Sent by SHA (EVALSHA); redis-py loads it on the first NOSCRIPT reply
+zone_alert_script = redis_sync.register_script(ZONE_ALERT_LUA)
+
+def stats_upsert(rows):
+    """
+    Builds the multi-row upsert folding a batch into misurator_stats.
+    `rows` holds one pre-aggregated entry per sensor (a single INSERT may not
+    touch the same row twice), sorted by misurator_id. Rows are locked in that
+    order until commit: concurrent workers never lose an update, and since
+    every transaction locks in the same order, two batches sharing sensors
+    wait for each other instead of deadlocking.
+    """
+    stmt = pg_insert(MisuratorStats).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[MisuratorStats.misurator_id],
+        set_={
+            "total_readings": MisuratorStats.total_readings + stmt.excluded.total_readings,
+            "value_sum": MisuratorStats.value_sum + stmt.excluded.value_sum,
+            "max_value": func.greatest(MisuratorStats.max_value, stmt.excluded.max_value),
+            "min_value": func.least(MisuratorStats.min_value, stmt.excluded.min_value)
+        }
+    )
+
+def batch_stats(events):
+    """
+    Aggregates a batch into one misurator_stats row per sensor, in
+    misurator_id order (the lock order of stats_upsert).
+    """
+    stats = {}
+    for event in events:
+        value = event['value']
+        row = stats.get(event['misurator_id'])
+        if row is None:
+            stats[event['misurator_id']] = {
+                "misurator_id": event['misurator_id'],
+                "total_readings": 1,
+                "value_sum": value,
+                "max_value": value,
+                "min_value": value
+            }
+        else:
+            row["total_readings"] += 1
+            row["value_sum"] += value
+            row["max_value"] = max(row["max_value"], value)
+            row["min_value"] = min(row["min_value"], value)
+    return [stats[misurator_id] for misurator_id in sorted(stats)]
+
+@lru_cache(maxsize=4096)
+def zone_alert_keys(zone_id: int):
+    """
+    Redis keys of a zone's alert counter and cooldown flag, built once per zone.
+    Pre-encoded to bytes, which redis-py sends as-is. The alerts stream comes
+    last, as the script's third key.
+    """
+    return (f"zone:{zone_id}:alerts".encode(), f"zone:{zone_id}:alarm_cooldown".encode(), SEISMIC_ALERTS_STREAM.encode())
+
+def decode_event(data):
+    """
+    Parses one queued event; raises ValueError if it is not a usable reading.
+    """
+    # orjson.JSONDecodeError is a ValueError
+    event = orjson.loads(data)
+    if not isinstance(event, dict) or not EVENT_FIELDS <= event.keys():
+        raise ValueError(f"not a reading event: {data[:80]}")
+    # Plain ints within the INTEGER columns' range only (bool is an int
+    # subclass): anything else would fail outside the database, in
+    # batch_stats or the COPY buffer, and stall the batch instead of
+    # being dropped here
+    for field in EVENT_FIELDS:
+        field_value = event[field]
+        if type(field_value) is not int or not INT32_MIN <= field_value <= INT32_MAX:
+            raise ValueError(f"bad {field} in reading event: {data[:80]}")
+    return event
+
+def ensure_consumer_group(stream: str = SEISMIC_EVENTS_STREAM):
+    """
+    Creates the consumer group (and the stream itself) if missing. New groups
+    start at "0", so entries published before the first worker ran are kept.
+    """
+    try:
+        redis_sync.xgroup_create(stream, CONSUMER_GROUP, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+def read_entries(stream: str, pending: bool, count: int):
+    """
+    Reads up to `count` entries of `stream` with a single XREADGROUP: one
+    round-trip for the whole backlog. With `pending`, re-reads this consumer's
+    delivered but unacknowledged entries instead (after a restart or a failed
+    batch); otherwise blocks for new ones. Entries come back oldest first (FIFO).
+
+    Returns a list of (entry_id, fields) pairs, empty once nothing is left.
+    """
+    response = redis_sync.xreadgroup(
+        CONSUMER_GROUP,
+        CONSUMER_NAME,
+        {stream: "0" if pending else ">"},
+        count=count,
+        block=None if pending else STREAM_BLOCK_MS
+    )
+    if not response:
+        return []
+    _, entries = response[0]
+    # Pending entries trimmed from the stream meanwhile come back without fields
+    return [(entry_id, fields or {}) for entry_id, fields in entries]
+
+def next_batch(pending: bool):
+    """
+    Reads up to MAX_BATCH seismic events (see read_entries).
+    Returns a list of (entry_id, data) pairs, empty once nothing is left.
+    """
+    entries = read_entries(SEISMIC_EVENTS_STREAM, pending, MAX_BATCH)
+    return [(entry_id, fields.get(EVENT_FIELD)) for entry_id, fields in entries]
 
-# Synchronous Redis client for the worker loop
-redis_sync = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0, decode_responses=True)
+def copy_misurations(db, events):
+    """
+    Streams a batch of readings into misurations with COPY FROM STDIN.
+    Runs on the session's own connection, so it commits (or rolls back)
+    together with the rest of the batch.
+    """
+    buffer = io.StringIO()
+    for event in events:
+        # decode_event only lets plain ints through: written as-is
+        buffer.write(f"{event['value']}\t{event['misurator_id']}\n")
+    buffer.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(COPY_MISURATIONS_SQL, buffer)
+    finally:
+        cursor.close()
+
+def store_events(db, events):
+    """
+    Persists a batch of readings in a single transaction on the worker's
+    long-lived session: one commit (one WAL flush) per batch, and any error
+    rolls the whole batch back.
+    """
+    with db.begin():
+        # created_at is handled automatically by DB default
+        if len(events) >= COPY_MIN_BATCH:
+            copy_misurations(db, events)
+        else:
+            # One Core executemany for the whole batch: SQLAlchemy's
+            # insertmanyvalues sends it as multi-row INSERT ... VALUES pages
+            # (1000 rows each) instead of one statement per reading.
+            db.execute(insert(Misuration), [
+                {"value": event['value'], "misurator_id": event['misurator_id']}
+                for event in events
+            ])
+
+        # Fold the batch into the sensors' running aggregates (one upsert)
+        db.execute(stats_upsert(batch_stats(events)))
+
+def store_events_one_by_one(db, events):
+    """
+    Fallback for a batch the database refused: stores each reading in its own
+    savepoint, within one transaction, so only the offending readings are
+    left out. Returns (stored, rejected), rejected holding (event, error)
+    pairs. Errors not caused by the data (e.g. a lost connection) still
+    abort the whole batch.
+    """
+    stored, rejected = [], []
+    with db.begin():
+        # Sensor order, like batch_stats: the stats rows are locked in the
+        # same order as in every other transaction
+        for event in sorted(events, key=lambda event: event['misurator_id']):
+            try:
+                with db.begin_nested():
+                    db.execute(insert(Misuration).values(value=event['value'], misurator_id=event['misurator_id']))
+                    db.execute(stats_upsert(batch_stats([event])))
+            except REJECTED_DATA_ERRORS as e:
+                rejected.append((event, e))
+            else:
+                stored.append(event)
+    return stored, rejected
+
+def update_zone_counters(events):
+    """
+    Updates the zones' real-time alert counters in Redis & checks the threshold.
+    Key: "zone:{id}:alerts" -> Increments with every high-vibration event.
+    One ZONE_ALERT_SCRIPT call per zone (INCRBY with the batch's event count),
+    every zone in a single pipeline: one round-trip per batch. Alarms are only
+    queued here; the alert worker writes the Alert rows.
+    """
+    zone_counts = Counter(event['zone_id'] for event in events)
+    detected_at = time.time()
+
+    pipe = redis_sync.pipeline()
+    for zone_id, count in zone_counts.items():
+        zone_alert_script(
+            keys=zone_alert_keys(zone_id),
+            args=[count, ALERT_WINDOW_SECONDS, ALERT_THRESHOLD, ALERT_COOLDOWN,
+                  zone_id, detected_at, SEISMIC_ALERTS_MAXLEN],
+            client=pipe
+        )
+    results = pipe.execute()
+
+    # The script queued an alarm for each zone that claimed one
+    for zone_id, (current_count, should_alarm) in zip(zone_counts, results):
+        if should_alarm:
+            print(f"🚨 CRITICAL ALARM! Zone {zone_id} has {current_count} events!")
+
+def process_batch(db, events):
+    """
+    Persists a batch of readings, then updates their zones' alert counters.
+    Returns the readings the database rejected, as (event, error) pairs.
+    """
+    # 1. Persist raw measurements to PostgreSQL
+    try:
+        store_events(db, events)
+        rejected = []
+    except REJECTED_DATA_ERRORS:
+        # One bad reading must not block the stream: retry row by row
+        events, rejected = store_events_one_by_one(db, events)
+
+    # 2. Counters only move once the readings are committed, so a batch that
+    # failed (and is replayed) is never counted twice, and an alarm is never
+    # raised for readings that were not stored. The readings are already in,
+    # so a Redis error here loses this batch's counts instead of failing it.
+    if events:
+        try:
+            update_zone_counters(events)
+        except redis.RedisError as e:
+            print(f"⚠️ Alert counters not updated for {len(events)} events: {str(e)}")
+    return rejected
+
+def acknowledge(entry_ids, rejected):
+    """
+    Moves the rejected readings to the dead-letter stream and acknowledges the
+    whole batch, in one MULTI/EXEC: a rejected reading is never dropped
+    without its dead-letter copy.
+    """
+    pipe = redis_sync.pipeline()
+    for event, error in rejected:
+        reason = str(getattr(error, "orig", error)).strip()
+        print(f"⚠️ Dead-lettering reading of sensor {event['misurator_id']}: {reason}")
+        pipe.xadd(
+            SEISMIC_EVENTS_DEAD_STREAM,
+            {EVENT_FIELD: orjson.dumps(event), "error": reason},
+            maxlen=SEISMIC_EVENTS_DEAD_MAXLEN,
+            approximate=True
+        )
+    pipe.xack(SEISMIC_EVENTS_STREAM, CONSUMER_GROUP, *entry_ids)
+    pipe.execute()
 
 def run_worker():
     """
-    Continuous loop consuming messages from the 'seismic_events' queue.
-    Uses BRPOP (Blocking Right Pop) for efficient resource utilization.
+    Continuous loop consuming events from the 'seismic_events_stream' stream.
+    Uses XREADGROUP (blocking, COUNT=MAX_BATCH) for efficient resource
+    utilization: every wake-up takes whatever is queued in one call.
     """
-    print(f"👷 Worker started. Threshold: {ALERT_THRESHOLD} events / {ALERT_WINDOW_SECONDS}s")
+    print(f"👷 Worker {CONSUMER_NAME} started. Threshold: {ALERT_THRESHOLD} events / {ALERT_WINDOW_SECONDS}s")
+
+    # One session for the worker's lifetime; each batch runs in its own
+    # transaction, and the pooled connection is released between batches
+    db = SessionLocal()
+
+    # Start with entries left unacknowledged by a previous run
+    pending = True
     
     while True:
         try:
-            # Blocking pop from the tail of the list (waits until data is available)
-            _, data = redis_sync.brpop("seismic_events")
-            event = json.loads(data)
-            
-            zone_id = event['zone_id']
-            
-            with SessionLocal() as db:
-                # 1. Persist raw measurement to PostgreSQL
-                new_misuration = Misuration(
-                    value=event['value'],
-                    misurator_id=event['misurator_id']
-                    # created_at is handled automatically by DB default
-                )
-                db.add(new_misuration)
-                
-                # 2. Update real-time alert counter in Redis
-                # Key: "zone:{id}:alerts" -> Increments with every high-vibration event
-                zone_counter_key = f"zone:{zone_id}:alerts"
-                
-                pipe = redis_sync.pipeline()
-                pipe.incr(zone_counter_key)
-                pipe.expire(zone_counter_key, ALERT_WINDOW_SECONDS) 
-                # Execute and get the new counter value
-                results = pipe.execute()
-                current_count = results[0]
-
-                # 3. Check Threshold & Generate Alert
-                if current_count >= ALERT_THRESHOLD:
-                    # Check if we are in a "cooldown" period to avoid spamming the DB
-                    cooldown_key = f"zone:{zone_id}:alarm_cooldown"
-                    
-                    if not redis_sync.exists(cooldown_key):
-                        print(f"🚨 CRITICAL ALARM! Zone {zone_id} has {current_count} events!")
-                        
-                        # Create persistent Alert record
-                        new_alert = Alert(
-                            zone_id=zone_id,
-                            severity=float(current_count) / 10.0, # Example severity logic
-                            message=f"Seismic Swarm Detected: {current_count} sensors triggered.",
-                            timestamp=datetime.utcnow()
-                        )
-                        db.add(new_alert)
-                        
-                        # Set cooldown flag (expires in 60s)
-                        redis_sync.setex(cooldown_key, ALERT_COOLDOWN, "active")
-                
-                db.commit()
-                
+            if pending:
+                ensure_consumer_group()
+            batch = next_batch(pending)
+        except Exception as e:
+            print(f"❌ Error reading the event stream: {str(e)}")
+            pending = True # Recreate the group if Redis lost it, then replay
+            time.sleep(1) # Prevent rapid-fire errors if the Redis connection drops
+            continue
+
+        if not batch:
+            # Backlog replayed (or block timeout): go back to new entries
+            pending = False
+            continue
+
+        # A malformed record is skipped (and acknowledged) on its own, not
+        # with its whole batch
+        events = []
+        for _, data in batch:
+            try:
+                events.append(decode_event(data))
+            except (ValueError, TypeError) as e:
+                print(f"⚠️ Dropping malformed event: {str(e)}")
+
+        try:
+            rejected = process_batch(db, events) if events else []
+            # Acknowledged only once committed: a crash before this point
+            # leaves the entries pending, and they are replayed on restart
+            acknowledge([entry_id for entry_id, _ in batch], rejected)
         except Exception as e:
-            print(f"❌ Error processing event: {str(e)}")
+            print(f"❌ Error processing batch of {len(events)} events: {str(e)}")
+            pending = True # Retry the unacknowledged entries
             time.sleep(1) # Prevent rapid-fire errors if DB/Redis connection drops
 
 if __name__ == "__main__":
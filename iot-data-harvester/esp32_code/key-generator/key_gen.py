@@ -7,22 +7,22 @@ Description:
     Useful for testing Backend APIs without physical hardware.
 
 Dependencies:
-    pip install ecdsa
+    pip install cryptography
 """
 
 import time
 import json
-import binascii
 from typing import Tuple
-from ecdsa import SigningKey, NIST256p
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
 
-def generate_identity() -> Tuple[SigningKey, str]:
+def generate_identity() -> Tuple[ec.EllipticCurvePrivateKey, str]:
     """
     Generates a new ECDSA Key Pair using the NIST256p curve (secp256r1).
     This matches the cryptography standard used by the ESP32 firmware.
 
     Returns:
-        Tuple[SigningKey, str]: 
+        Tuple[ec.EllipticCurvePrivateKey, str]: 
             - The Private Key object (for signing).
             - The Public Key string in Hexadecimal format (for the database).
     """
@@ -30,16 +30,21 @@ def generate_identity() -> Tuple[SigningKey, str]:
     
     # 1. Generate Private Key (NIST256p / SECP256R1)
     # The private key is the secret "identity" of the device.
-    private_key = SigningKey.generate(curve=NIST256p)
+    # Generated by OpenSSL (via the cryptography package).
+    private_key = ec.generate_private_key(ec.SECP256R1())
     
     # 2. Derive Public Key
     # The public key is derived mathematically from the private key.
     # It is safe to share and is used by the server to verify signatures.
-    public_key = private_key.verifying_key
+    public_key = private_key.public_key()
     
     # Convert to Hex strings for storage/transmission
-    priv_hex = binascii.hexlify(private_key.to_string()).decode()
-    pub_hex = binascii.hexlify(public_key.to_string()).decode()
+    # Private: raw 32-byte scalar. Public: raw X||Y (64 bytes, no 0x04 prefix).
+    priv_hex = private_key.private_numbers().private_value.to_bytes(32, "big").hex()
+    pub_hex = public_key.public_bytes(
+        serialization.Encoding.X962,
+        serialization.PublicFormat.UncompressedPoint
+    )[1:].hex()
     
     print(f"🔑 PRIVATE KEY (Keep Secret): {priv_hex}")
     print(f"🌍 PUBLIC KEY  (Database):    {pub_hex}")
@@ -47,12 +52,12 @@ def generate_identity() -> Tuple[SigningKey, str]:
     
     return private_key, pub_hex
 
-def create_signed_payload(signing_key: SigningKey, sensor_id: int = 101) -> dict:
+def create_signed_payload(signing_key: ec.EllipticCurvePrivateKey, sensor_id: int = 101) -> dict:
     """
     Creates a simulated sensor payload and signs it digitally.
 
     Args:
-        signing_key (SigningKey): The private key used to sign the data.
+        signing_key (ec.EllipticCurvePrivateKey): The private key used to sign the data.
         sensor_id (int): The ID of the simulated sensor.
 
     Returns:
@@ -70,9 +75,10 @@ def create_signed_payload(signing_key: SigningKey, sensor_id: int = 101) -> dict
     print(f"ℹ️  Raw Data String: '{message_to_sign}'")
     
     # Digital Signature Generation
-    # We sign the UTF-8 bytes of the string using the Private Key
-    signature = signing_key.sign(message_to_sign.encode('utf-8'))
-    signature_hex = binascii.hexlify(signature).decode()
+    # We sign the UTF-8 bytes of the string using the Private Key, hashed with
+    # SHA-256 like the firmware; the signature comes out DER-encoded (MbedTLS format)
+    signature = signing_key.sign(message_to_sign.encode('utf-8'), ec.ECDSA(hashes.SHA256()))
+    signature_hex = signature.hex()
     
     print(f"✍️  ECDSA Signature: {signature_hex}")
     